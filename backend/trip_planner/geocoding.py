@@ -0,0 +1,169 @@
+"""
+Location search via OpenStreetMap Nominatim (free, no API key needed)
+"""
+import hashlib
+import threading
+import time
+
+import orjson
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+
+NOMINATIM_URL = 'https://nominatim.openstreetmap.org/search'
+GEOCODE_CACHE_TTL = 7 * 24 * 60 * 60  # place names barely move; keep hits for a week
+NOMINATIM_MIN_INTERVAL = 1.0          # usage policy: at most 1 request per second
+NOMINATIM_MAX_WAIT = 5.0              # give up rather than queue a worker thread longer
+GEOCODE_TIMEOUT = (3.05, 5.0)         # (connect, read) seconds
+GEOCODE_RETRIES = 2                   # extra attempts after a connection error or 5xx
+GEOCODE_RETRY_STATUSES = frozenset({502, 503, 504})
+
+# One pooled session per process so geocode calls reuse the TCP/TLS
+# connection to Nominatim instead of handshaking on every request.
+_SESSION = requests.Session()
+_SESSION.headers.update({'User-Agent': 'ELD-TripPlanner/1.0'})
+# No adapter-level retries: they would run after _NOMINATIM_LIMITER.wait()
+# and burst past the 1 req/sec policy. _search_public() retries instead.
+_SESSION.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
+# The self-hosted NOMINATIM_LOCAL_URL is only worth trying if it answers at
+# once, so its session keeps requests' default no-retry adapters: a down
+# instance falls through to the public one without backoff delays.
+_LOCAL_SESSION = requests.Session()
+_LOCAL_SESSION.headers.update({'User-Agent': 'ELD-TripPlanner/1.0'})
+
+
+class NominatimBusy(requests.RequestException):
+    """Raised when the rate limiter queue is too long to wait for a slot."""
+
+
+class _RateLimiter:
+    """
+    Space calls at least `interval` seconds apart across all threads.
+
+    Each caller reserves the next free slot under the lock and then sleeps
+    outside it, so waiting threads don't serialize on the lock itself.
+    """
+    def __init__(self, interval: float, max_wait: float):
+        self.interval = interval
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            if slot - now > self.max_wait:
+                raise NominatimBusy('Too many geocode requests queued, try again shortly')
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_NOMINATIM_LIMITER = _RateLimiter(NOMINATIM_MIN_INTERVAL, NOMINATIM_MAX_WAIT)
+
+
+def _cache_key(query: str) -> str:
+    """Cache key for a query, ignoring case and runs of whitespace."""
+    normalized = ' '.join(query.lower().split())
+    return 'geocode:' + hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def _search(session: requests.Session, url: str, query: str, timeout) -> list:
+    """Run a Nominatim /search request and normalize the matches."""
+    params = {
+        'q': query,
+        'format': 'json',
+        'limit': 5,
+        'countrycodes': 'us',
+    }
+    resp = session.get(url, params=params, timeout=timeout)
+    resp.raise_for_status()
+    try:
+        results = orjson.loads(resp.content)
+    except orjson.JSONDecodeError as e:
+        # Keep a garbled body on the RequestException path, as resp.json() did
+        raise requests.exceptions.InvalidJSONError(str(e), response=resp) from e
+
+    # Valid JSON in another shape (e.g. Photon's GeoJSON) is just as unusable
+    if not isinstance(results, list):
+        raise requests.exceptions.InvalidJSONError(
+            'Expected a list of places', response=resp
+        )
+    try:
+        return [
+            {
+                'name': r.get('display_name', ''),
+                'lat': float(r['lat']),
+                'lon': float(r['lon']),
+                'type': r.get('type', ''),
+            }
+            for r in results
+        ]
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        raise requests.exceptions.InvalidJSONError(
+            f'Unexpected place record: {e!r}', response=resp
+        ) from e
+
+
+def _search_public(query: str) -> list:
+    """
+    Query the public instance, retrying transient failures.
+
+    Every attempt takes its own rate-limiter slot, so retries stay within
+    the usage policy and the slot spacing doubles as backoff. Only quick
+    failures (connection errors, 502/503/504) are retried, and none starts
+    after NOMINATIM_MAX_WAIT; timeouts, 429s and a full limiter queue fail
+    at once so a worker thread isn't held for several timeouts.
+    """
+    deadline = time.monotonic() + NOMINATIM_MAX_WAIT
+    for attempt in range(GEOCODE_RETRIES + 1):
+        _NOMINATIM_LIMITER.wait()
+        try:
+            return _search(_SESSION, NOMINATIM_URL, query, timeout=GEOCODE_TIMEOUT)
+        except requests.Timeout:
+            raise
+        except (requests.ConnectionError, requests.HTTPError) as e:
+            if isinstance(e, requests.HTTPError) and (
+                e.response.status_code not in GEOCODE_RETRY_STATUSES
+            ):
+                raise
+            if attempt == GEOCODE_RETRIES or time.monotonic() >= deadline:
+                raise
+
+
+def geocode(query: str) -> list:
+    """
+    Look up `query` and return up to 5 US matches as {name, lat, lon, type}.
+
+    Results are kept in Django's cache, so repeated searches (the same city
+    typed by many users) skip the network. On a miss, a self-hosted
+    Nominatim (settings.NOMINATIM_LOCAL_URL) is tried first when configured;
+    the public instance is the fallback for errors or empty results, paced
+    to its 1 req/sec policy (retries included) so callers wait for a slot
+    instead of getting 429s. Raises requests.Timeout if the public instance is too slow, and
+    requests.RequestException if it can't be reached or the wait would
+    exceed NOMINATIM_MAX_WAIT.
+    """
+    key = _cache_key(query)
+    locations = cache.get(key)
+    if locations is not None:
+        return locations
+
+    if settings.NOMINATIM_LOCAL_URL:
+        try:
+            # Same box or network: fail fast and fall back
+            locations = _search(
+                _LOCAL_SESSION, settings.NOMINATIM_LOCAL_URL, query, timeout=(0.5, 2)
+            )
+        except requests.RequestException:
+            locations = None
+
+    if not locations:
+        locations = _search_public(query)
+
+    cache.set(key, locations, GEOCODE_CACHE_TTL)
+    return locations
@@ -0,0 +1,29 @@
+"""
+Response renderers for the trip planner API
+"""
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON renderer backed by orjson.
+
+    Trip plans are deeply nested (stops, day logs, route coords) and float
+    heavy, which orjson encodes in C. Anything orjson doesn't handle natively
+    falls back to DRF's own encoder, and non-string dict keys (e.g. the list
+    indexes in ListField errors) are stringified as JSONRenderer does.
+    Unlike JSONRenderer's STRICT_JSON, NaN and infinity are written as null
+    rather than raising.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    _default = staticmethod(JSONEncoder().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=self._default, option=orjson.OPT_NON_STR_KEYS)
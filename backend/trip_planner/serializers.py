@@ -0,0 +1,70 @@
+"""
+Request validation for the trip planner API
+"""
+import math
+
+from rest_framework import serializers
+
+
+CYCLE_RANGE_MESSAGE = 'cycle_hours_used must be between 0 and 70'
+
+
+class FiniteFloatField(serializers.FloatField):
+    """FloatField that also rejects 'nan' and 'inf', which float() accepts."""
+    default_error_messages = {'non_finite': 'A finite number is required.'}
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        if not math.isfinite(value):
+            self.fail('non_finite')
+        return value
+
+
+class PlanTripSerializer(serializers.Serializer):
+    """Body of POST /api/plan-trip/."""
+    current_lat = FiniteFloatField(min_value=-90, max_value=90)
+    current_lon = FiniteFloatField(min_value=-180, max_value=180)
+    current_location = serializers.CharField(allow_blank=True, trim_whitespace=False)
+    pickup_lat = FiniteFloatField(min_value=-90, max_value=90)
+    pickup_lon = FiniteFloatField(min_value=-180, max_value=180)
+    pickup_location = serializers.CharField(allow_blank=True, trim_whitespace=False)
+    dropoff_lat = FiniteFloatField(min_value=-90, max_value=90)
+    dropoff_lon = FiniteFloatField(min_value=-180, max_value=180)
+    dropoff_location = serializers.CharField(allow_blank=True, trim_whitespace=False)
+    # No upper bound here: at or over 70 hrs the view answers with the
+    # structured hard-limit payload instead of a generic range error.
+    cycle_hours_used = FiniteFloatField(
+        min_value=0,
+        error_messages={'min_value': CYCLE_RANGE_MESSAGE},
+    )
+
+
+class GeocodeBatchSerializer(serializers.Serializer):
+    """Body of POST /api/geocode/batch/."""
+    queries = serializers.ListField(
+        child=serializers.CharField(),
+        min_length=1,
+        max_length=10,
+    )
+
+
+# Built once so the 400 path for a missing field doesn't format a string;
+# first_error() still formats one for serializers not listed here
+_MISSING_FIELD_MESSAGES = {
+    name: f'Missing required field: {name}'
+    for serializer in (PlanTripSerializer, GeocodeBatchSerializer)
+    for name in serializer().fields
+}
+
+
+def first_error(errors) -> str:
+    """Flatten serializer errors into the API's single {'error': ...} message."""
+    field, detail = next(iter(errors.items()))
+    # Unwrap [message] lists and ListField's {index: [message]} dicts
+    while isinstance(detail, (list, dict)):
+        detail = next(iter(detail.values())) if isinstance(detail, dict) else detail[0]
+    if getattr(detail, 'code', None) == 'required':
+        return _MISSING_FIELD_MESSAGES.get(field) or f'Missing required field: {field}'
+    if field == 'cycle_hours_used' and detail == CYCLE_RANGE_MESSAGE:
+        return CYCLE_RANGE_MESSAGE
+    return f'Invalid value for {field}: {detail}'
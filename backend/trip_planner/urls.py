@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import PlanTripView, GeocodeView, HealthView
+from .views import PlanTripView, GeocodeView, GeocodeBatchView, health
 
 urlpatterns = [
     path('plan-trip/', PlanTripView.as_view(), name='plan-trip'),
     path('geocode/', GeocodeView.as_view(), name='geocode'),
-    path('health/', HealthView.as_view(), name='health'),
+    path('geocode/batch/', GeocodeBatchView.as_view(), name='geocode-batch'),
+    path('health/', health, name='health'),
 ]
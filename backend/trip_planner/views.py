@@ -1,9 +1,20 @@
 import json
 import requests
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .hos_calculator import calculate_trip
+from .geocoding import geocode
+from .hos_calculator import TripPlanError, calculate_trip
+from .serializers import GeocodeBatchSerializer, PlanTripSerializer, first_error
+
+
+# Fixed error texts: upstream exception details stay out of responses
+INVALID_VALUE_MESSAGE = 'Invalid numeric value'
+TRIP_PLAN_FAILED_MESSAGE = 'This trip could not be planned'
+GEOCODE_FAILED_MESSAGE = 'Geocoding failed, try again shortly'
+GEOCODE_TIMEOUT_MESSAGE = 'Geocoding timed out'
 
 
 class PlanTripView(APIView):
@@ -12,51 +23,39 @@ class PlanTripView(APIView):
     Calculate HOS-compliant trip plan with stops and ELD logs.
     """
     def post(self, request):
-        data = request.data
-        
-        required = ['current_lat', 'current_lon', 'current_location',
-                    'pickup_lat', 'pickup_lon', 'pickup_location',
-                    'dropoff_lat', 'dropoff_lon', 'dropoff_location',
-                    'cycle_hours_used']
-        
-        for field in required:
-            if field not in data:
-                return Response(
-                    {'error': f'Missing required field: {field}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        try:
-            cycle_hours = float(data['cycle_hours_used'])
-            if cycle_hours < 0 or cycle_hours > 70:
-                return Response(
-                    {'error': 'cycle_hours_used must be between 0 and 70'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        serializer = PlanTripSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {'error': first_error(serializer.errors)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        data = serializer.validated_data
+        cycle_hours = data['cycle_hours_used']
 
-            # Hard block: driver is already at or over the 70-hour limit
-            if cycle_hours >= 70:
-                return Response({
-                    'error': 'Cycle limit reached',
-                    'cycle_warning': True,
-                    'cycle_warning_type': 'hard_limit',
-                    'message': (
-                        f'You have used all 70 hours in your 8-day cycle. '
-                        f'You cannot legally drive until enough days drop off '
-                        f'your rolling 8-day window, or you take a 34-hour restart '
-                        f'(34 consecutive hours off-duty) to reset your cycle to 0.'
-                    )
-                }, status=status.HTTP_400_BAD_REQUEST)
+        # Hard block: driver is already at or over the 70-hour limit
+        if cycle_hours >= 70:
+            return Response({
+                'error': 'Cycle limit reached',
+                'cycle_warning': True,
+                'cycle_warning_type': 'hard_limit',
+                'message': (
+                    'You have used all 70 hours in your 8-day cycle. '
+                    'You cannot legally drive until enough days drop off '
+                    'your rolling 8-day window, or you take a 34-hour restart '
+                    '(34 consecutive hours off-duty) to reset your cycle to 0.'
+                )
+            }, status=status.HTTP_400_BAD_REQUEST)
 
+        try:
             result = calculate_trip(
-                current_lat=float(data['current_lat']),
-                current_lon=float(data['current_lon']),
+                current_lat=data['current_lat'],
+                current_lon=data['current_lon'],
                 current_location_name=data['current_location'],
-                pickup_lat=float(data['pickup_lat']),
-                pickup_lon=float(data['pickup_lon']),
+                pickup_lat=data['pickup_lat'],
+                pickup_lon=data['pickup_lon'],
                 pickup_location_name=data['pickup_location'],
-                dropoff_lat=float(data['dropoff_lat']),
-                dropoff_lon=float(data['dropoff_lon']),
+                dropoff_lat=data['dropoff_lat'],
+                dropoff_lon=data['dropoff_lon'],
                 dropoff_location_name=data['dropoff_location'],
                 cycle_hours_used=cycle_hours
             )
@@ -64,10 +63,7 @@ class PlanTripView(APIView):
             # Soft warning: trip will hit the cycle limit mid-way
             # We detect this by checking if a 34-hr restart was needed
             hours_remaining = 70.0 - cycle_hours
-            trip_on_duty_hours = sum(
-                d['total_driving'] + d['total_on_duty']
-                for d in result['day_logs']
-            )
+            trip_on_duty_hours = result['summary']['total_on_duty_hours']
 
             if trip_on_duty_hours > hours_remaining:
                 result['cycle_warning'] = True
@@ -83,15 +79,15 @@ class PlanTripView(APIView):
 
             return Response(result, status=status.HTTP_200_OK)
         
-        except ValueError as e:
+        except TripPlanError:
             return Response(
-                {'error': f'Invalid value: {str(e)}'},
-                status=status.HTTP_400_BAD_REQUEST
+                {'error': TRIP_PLAN_FAILED_MESSAGE},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
             )
-        except Exception as e:
+        except ValueError:
             return Response(
-                {'error': f'Calculation error: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': INVALID_VALUE_MESSAGE},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
 
@@ -106,33 +102,54 @@ class GeocodeView(APIView):
             return Response({'error': 'Query parameter q is required'}, status=400)
         
         try:
-            url = 'https://nominatim.openstreetmap.org/search'
-            params = {
-                'q': query,
-                'format': 'json',
-                'limit': 5,
-                'countrycodes': 'us',
-            }
-            headers = {'User-Agent': 'ELD-TripPlanner/1.0'}
-            resp = requests.get(url, params=params, headers=headers, timeout=5)
-            resp.raise_for_status()
-            results = resp.json()
-            
-            locations = []
-            for r in results:
-                locations.append({
-                    'name': r.get('display_name', ''),
-                    'lat': float(r['lat']),
-                    'lon': float(r['lon']),
-                    'type': r.get('type', ''),
-                })
-            
-            return Response({'results': locations})
+            return Response({'results': geocode(query)})
         
-        except requests.RequestException as e:
-            return Response({'error': f'Geocoding failed: {str(e)}'}, status=503)
+        except requests.Timeout:
+            return Response({'error': GEOCODE_TIMEOUT_MESSAGE}, status=504)
+        except requests.RequestException:
+            return Response({'error': GEOCODE_FAILED_MESSAGE}, status=503)
 
 
-class HealthView(APIView):
-    def get(self, request):
-        return Response({'status': 'ok', 'message': 'ELD Trip Planner API running'})
+class GeocodeBatchView(APIView):
+    """
+    POST /api/geocode/batch/  {"queries": ["chicago il", "dallas tx"]}
+    Geocode up to 10 locations in one call. Results are returned in query
+    order; repeated queries are looked up once. A query that fails gets a
+    null result and an entry in 'errors', so one slow or throttled lookup
+    doesn't discard the others.
+    """
+    def post(self, request):
+        serializer = GeocodeBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'error': first_error(serializer.errors)}, status=400)
+        queries = serializer.validated_data['queries']
+
+        found = {}  # query -> (locations, error message)
+        for query in queries:
+            if query in found:
+                continue
+            try:
+                found[query] = (geocode(query), None)
+            except requests.Timeout:
+                found[query] = (None, GEOCODE_TIMEOUT_MESSAGE)
+            except requests.RequestException:
+                found[query] = (None, GEOCODE_FAILED_MESSAGE)
+
+        results = []
+        errors = []
+        for index, query in enumerate(queries):
+            locations, error = found[query]
+            results.append(locations)
+            if error:
+                errors.append({'index': index, 'query': query, 'error': error})
+        return Response({'results': results, 'errors': errors})
+
+
+@require_safe
+def health(request):
+    """
+    GET /api/health/
+    Plain Django view: load-balancer probes skip DRF's negotiation,
+    authentication and throttling machinery.
+    """
+    return JsonResponse({'status': 'ok', 'message': 'ELD Trip Planner API running'})